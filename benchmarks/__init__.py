@@ -0,0 +1,54 @@
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+# Shared helpers for the benchmark suite (python -m benchmarks ...).
+# Every run writes one JSON document so two runs can be diffed with `python -m benchmarks compare`.
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_SESSION_KEY = "9523"
+
+
+def timed(fn, repeat=5, warmup=1):
+    # Returns per-call wall time stats in seconds
+    for _ in range(warmup): fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return {"repeat": repeat, "min": min(samples), "median": statistics.median(samples), "mean": statistics.fmean(samples), "max": max(samples)}
+
+
+def percentile(values, pct):
+    if not values: return None
+    ordered = sorted(values)
+    k = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[k]
+
+
+def run_info():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": commit,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def write_results(kind, results, out_path):
+    doc = {"kind": kind, "run": run_info(), "results": results}
+    with open(out_path, "w") as f:
+        json.dump(doc, f, indent=4)
+    print(f"Results written to {out_path}")
+    return doc
@@ -0,0 +1,67 @@
+import argparse
+import json
+import os
+
+from benchmarks import BENCH_SESSION_KEY, REPO_ROOT, write_results
+from benchmarks import micro, loadgen
+
+
+def compare(base_path, new_path):
+    # Prints every numeric leaf that exists in both runs with the relative change
+    with open(base_path) as f: base = json.load(f)["results"]
+    with open(new_path) as f: new = json.load(f)["results"]
+
+    def walk(a, b, prefix=""):
+        for k, v in a.items():
+            if k not in b: continue
+            if isinstance(v, dict): walk(v, b[k], f"{prefix}{k}.")
+            elif isinstance(v, (int, float)) and isinstance(b[k], (int, float)) and v:
+                print(f"{prefix + k:<45} {v:>14.6g} -> {b[k]:<14.6g} {(b[k] - v) / v * 100:+7.1f}%")
+    walk(base, new)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_micro = sub.add_parser("micro", help="load / encode / static JSON / builder merge timings")
+    p_micro.add_argument("--repeat", type=int, default=3)
+    p_micro.add_argument("--out", default="bench_micro.json")
+
+    p_load = sub.add_parser("loadgen", help="simulated Cardputer websocket clients")
+    p_load.add_argument("--clients", type=int, default=10)
+    p_load.add_argument("--seconds", type=float, default=20)
+    p_load.add_argument("--host", default="127.0.0.1")
+    p_load.add_argument("--port", type=int, default=8765)
+    p_load.add_argument("--no-spawn", action="store_true", help="use an already running server")
+    p_load.add_argument("--out", default="bench_loadgen.json")
+
+    p_render = sub.add_parser("render", help="replay renderer frames/sec (needs matplotlib)")
+    p_render.add_argument("--frames", type=int, default=500)
+    p_render.add_argument("--out", default="bench_render.json")
+
+    p_cmp = sub.add_parser("compare", help="diff two result files")
+    p_cmp.add_argument("base")
+    p_cmp.add_argument("new")
+
+    args = parser.parse_args()
+    # Session data paths are relative to the repo root; result paths stay relative to the caller
+    if hasattr(args, "out"): args.out = os.path.abspath(args.out)
+    os.chdir(REPO_ROOT)
+    if args.cmd == "micro":
+        write_results("micro", micro.run(repeat=args.repeat), args.out)
+    elif args.cmd == "loadgen":
+        results = loadgen.run(args.clients, args.seconds, args.host, args.port, spawn=not args.no_spawn)
+        print(json.dumps(results, indent=4))
+        write_results("loadgen", results, args.out)
+    elif args.cmd == "render":
+        import replayRenderer
+        results = replayRenderer.benchmark(replayRenderer.load_replay(BENCH_SESSION_KEY), args.frames)
+        print(json.dumps(results, indent=4))
+        write_results("render", results, args.out)
+    elif args.cmd == "compare":
+        compare(args.base, args.new)
+
+
+if __name__ == "__main__":
+    main()
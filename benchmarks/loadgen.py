@@ -0,0 +1,90 @@
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks import REPO_ROOT, BENCH_SESSION_KEY, percentile
+
+# Opens N simulated Cardputer websocket clients against a server and measures what they see:
+# frames/sec per client, inter-frame jitter (deviation from the 100ms frame interval) and,
+# when the server is spawned locally, its CPU usage over the run.
+
+FRAME_INTERVAL = 0.1
+
+
+def proc_cpu_seconds(pid):
+    # utime + stime from /proc (Linux); None elsewhere
+    try:
+        with open(f"/proc/{pid}/stat") as f: fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+async def client(url, seconds, stats):
+    import websockets
+
+    arrivals = []
+    async with websockets.connect(url, max_size=None) as ws:
+        deadline = time.perf_counter() + seconds
+        while (remaining := deadline - time.perf_counter()) > 0:
+            try: msg = await asyncio.wait_for(ws.recv(), timeout=remaining)
+            except asyncio.TimeoutError: break
+            # Position frames only; LEADERBOARD / EVENT / GAPS lines are extra messages on the same tick
+            parts = msg.split("|", 2)
+            if len(parts) > 1 and parts[1] not in ("LEADERBOARD", "EVENT", "GAPS", "FINISHED"):
+                arrivals.append(time.perf_counter())
+
+    gaps = [b - a for a, b in zip(arrivals, arrivals[1:])]
+    stats["frames"].append(len(arrivals))
+    stats["jitter"].extend(abs(g - FRAME_INTERVAL) for g in gaps)
+
+
+async def run_clients(url, n_clients, seconds):
+    stats = {"frames": [], "jitter": []}
+    await asyncio.gather(*(client(url, seconds, stats) for _ in range(n_clients)))
+    return stats
+
+
+def spawn_server(port):
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "server:app", "--port", str(port), "--log-level", "warning"],
+                            cwd=REPO_ROOT, stdout=subprocess.DEVNULL)
+    # Wait for the port, then load the session once so the run doesn't measure the cold start
+    import urllib.request
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/session/{BENCH_SESSION_KEY}/drivers")
+            break
+        except OSError:
+            time.sleep(0.2)
+    return proc
+
+
+def run(n_clients=10, seconds=20, host="127.0.0.1", port=8765, spawn=True, session_key=BENCH_SESSION_KEY):
+    proc = spawn_server(port) if spawn else None
+    url = f"ws://{host}:{port}/ws/{session_key}"
+    try:
+        if proc: asyncio.run(run_clients(url, 1, 1.0)) # warm up: first client triggers load_data
+        cpu_start = proc_cpu_seconds(proc.pid) if proc else None
+        wall_start = time.perf_counter()
+        stats = asyncio.run(run_clients(url, n_clients, seconds))
+        wall = time.perf_counter() - wall_start
+        cpu_end = proc_cpu_seconds(proc.pid) if proc else None
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait()
+
+    total_frames = sum(stats["frames"])
+    jitter_ms = [j * 1000 for j in stats["jitter"]]
+    return {
+        "clients": n_clients,
+        "seconds": seconds,
+        "frames_total": total_frames,
+        "frames_per_sec": total_frames / wall,
+        "frames_per_sec_per_client": total_frames / wall / n_clients,
+        "jitter_p50_ms": percentile(jitter_ms, 50),
+        "jitter_p99_ms": percentile(jitter_ms, 99),
+        "server_cpu_percent": (cpu_end - cpu_start) / wall * 100 if cpu_start is not None and cpu_end is not None else None,
+    }
@@ -0,0 +1,131 @@
+import contextlib
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import REPO_ROOT, BENCH_SESSION_KEY, timed
+
+# Micro-benchmarks for the hot paths on the bundled race:
+#   load_data        -> SessionManager.load_data (CSV read + 100ms resample for every driver)
+#   encode_frame     -> one websocket position frame
+#   static_json      -> GET /session/{key}/{file_type} handler
+#   builder_merge    -> openF1SessionBuilder.merge_driver_telemetry on fixtures recorded from the session
+#   track_projection -> TrackIndex.project for one 20-car batch (one live tick) and a whole session
+
+
+def quiet(fn):
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()): return fn()
+    return run
+
+
+def load_server():
+    import server
+    server.DATA_ROOT = REPO_ROOT
+    return server
+
+
+def bench_load_data(server, repeat):
+    session = quiet(lambda: server.SessionManager(BENCH_SESSION_KEY))()
+
+    def run():
+        session.drivers_data = {}
+        session.max_time = 0
+        session.load_data()
+
+    stats = timed(quiet(run), repeat=repeat)
+    stats["drivers"] = len(session.drivers_data)
+    quiet(session.load_track_positions)() # back to the columns a served session has
+    return session, stats
+
+
+def bench_encode_frame(session, n_frames=2000):
+    ticks = np.linspace(0, session.max_time, n_frames).astype(int) // 100 * 100
+    stats = timed(lambda: [session.encode_frame(int(t)) for t in ticks], repeat=3)
+    stats["frames"] = n_frames
+    stats["per_frame_mean"] = stats["mean"] / n_frames
+    return stats
+
+
+def bench_static_json(server, repeat):
+    results = {}
+    for file_type in ["drivers", "track_layout", "laps"]:
+        results[file_type] = timed(lambda: server.get_static_data(BENCH_SESSION_KEY, file_type), repeat=repeat)
+    return results
+
+
+def record_merge_fixtures(d_num):
+    # Rebuilds the builder's raw inputs for one driver from what is on disk:
+    # location / car / intervals come from the merged telemetry CSV, the rest from the JSON dumps.
+    base = f"{REPO_ROOT}/race_data_{BENCH_SESSION_KEY}"
+    with open(f"{base}/race_metadata.json") as f: start_dt = pd.Timestamp(json.load(f)["reference_start_time"])
+    def load(name):
+        with open(f"{base}/{name}.json") as f: return pd.DataFrame(json.load(f))
+
+    tel = pd.read_csv(f"{base}/telemetry/driver_{d_num}.csv")
+    tel['date'] = start_dt + pd.to_timedelta(tel['time_offset'], unit='ms')
+    tel['driver_number'] = d_num
+
+    loc_df = tel[['date', 'driver_number', 'x', 'y']].copy()
+    car_df = tel[['date', 'speed', 'rpm', 'n_gear', 'throttle', 'brake', 'drs']].copy()
+    changed = tel['gap_to_leader'].ne(tel['gap_to_leader'].shift()) | tel['interval'].ne(tel['interval'].shift())
+    intervals_df = tel.loc[changed, ['date', 'driver_number', 'gap_to_leader', 'interval']].copy()
+    intervals_df['date'] = intervals_df['date'].map(lambda d: d.isoformat())
+
+    return {
+        "d_num": d_num,
+        "loc_df": loc_df,
+        "car_df": car_df,
+        "intervals_df_raw": intervals_df,
+        "positions_df_raw": load("positions"),
+        "laps_df_raw": load("laps"),
+        "stints_df_raw": load("stints"),
+        "start_dt_obj": start_dt,
+    }
+
+
+def bench_builder_merge(repeat, d_num=16):
+    from openF1SessionBuilder import merge_driver_telemetry
+    fixtures = record_merge_fixtures(d_num)
+    stats = timed(lambda: merge_driver_telemetry(**fixtures), repeat=repeat)
+    stats["driver"] = d_num
+    stats["rows"] = len(fixtures["loc_df"])
+    return stats
+
+
+def bench_track_projection(session, n_cars=20):
+    ti = session.track_index
+    first = next(iter(session.drivers_data.values()))
+    # One tick's worth of cars, sampled from real positions around the lap
+    rows = first.iloc[np.linspace(0, len(first) - 1, n_cars).astype(int)]
+    x, y = rows['x'].to_numpy(dtype=float), rows['y'].to_numpy(dtype=float)
+    stats = {"per_tick": timed(lambda: ti.project(x, y), repeat=1000), "cars": n_cars}
+
+    all_x = np.concatenate([df['x'].to_numpy(dtype=float) for df in session.drivers_data.values()])
+    all_y = np.concatenate([df['y'].to_numpy(dtype=float) for df in session.drivers_data.values()])
+    stats["session"] = timed(lambda: ti.project(all_x, all_y), repeat=3)
+    stats["session"]["points"] = len(all_x)
+    # CPU share of one core to project n_cars at 10 Hz
+    stats["cpu_percent_at_10hz"] = stats["per_tick"]["median"] * 10 * 100
+    return stats
+
+
+def run(repeat=3):
+    os.chdir(REPO_ROOT)
+    server = load_server()
+    results = {}
+
+    print("load_data...")
+    session, results["load_data"] = bench_load_data(server, repeat)
+    print("encode_frame...")
+    results["encode_frame"] = bench_encode_frame(session)
+    print("static_json...")
+    results["static_json"] = bench_static_json(server, repeat * 5)
+    print("track_projection...")
+    results["track_projection"] = bench_track_projection(session)
+    print("builder_merge...")
+    results["builder_merge"] = bench_builder_merge(repeat)
+    return results
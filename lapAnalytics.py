@@ -0,0 +1,190 @@
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Lap / sector analytics over laps.json joined with stints.json.
+# Everything is computed with grouped pandas operations in one pass over all drivers, then cached
+# per session in race_data_{id}/analytics.json together with the size + mtime of the source files.
+# The cache is only rebuilt when one of those files changes.
+#
+# Tables:
+#   laps      -> every lap with its stint / compound / tyre age, clean-lap flag and running best sectors
+#   stints    -> pace (mean / median / best of clean laps) and degradation slope (s per lap of tyre age).
+#                lap_start is the out-lap, lap_end the in-lap (stints.json starts later stints on the previous in-lap)
+#   drivers   -> best lap, best sectors, theoretical best lap and how far the best lap is from it
+#   compounds -> pooled within-stint degradation slope and pace per compound
+# Degradation slopes are raw lap time vs tyre age, so fuel burn-off is included (often negative early on).
+
+SOURCE_FILES = ["laps", "stints"]
+CACHE_FILE = "analytics.json"
+CACHE_VERSION = 3 # bump when the table layout or the way rows are built changes
+CLEAN_LAP_CUTOFF = 1.07 # laps slower than 107% of the driver's median (SC, VSC, red flag, traffic) are not "clean"
+SECTORS = ["duration_sector_1", "duration_sector_2", "duration_sector_3"]
+
+TABLES = ["laps", "stints", "drivers", "compounds"]
+
+
+def source_signature(base_path):
+    sig = {}
+    for name in SOURCE_FILES:
+        path = f"{base_path}/{name}.json"
+        if os.path.exists(path):
+            st = os.stat(path)
+            sig[name] = [st.st_size, st.st_mtime_ns]
+    return sig
+
+
+def load_laps(base_path):
+    with open(f"{base_path}/laps.json") as f: laps = pd.DataFrame(json.load(f))
+    stints_path = f"{base_path}/stints.json"
+    stints = pd.DataFrame()
+    if os.path.exists(stints_path):
+        with open(stints_path) as f: stints = pd.DataFrame(json.load(f))
+
+    cols = ['driver_number', 'lap_number', 'lap_duration', 'is_pit_out_lap'] + SECTORS
+    laps = laps[[c for c in cols if c in laps.columns]].copy()
+    laps[['lap_duration'] + SECTORS] = laps[['lap_duration'] + SECTORS].apply(pd.to_numeric, errors='coerce')
+    laps['is_pit_out_lap'] = laps['is_pit_out_lap'].fillna(False).astype(bool)
+
+    # Stint per lap: join on driver, match laps inside [lap_start, lap_end]. OpenF1 stints share their boundary
+    # lap; that lap is the in-lap on the old tyres, so it goes to the earlier stint (raceTimeline's PIT_IN lap too).
+    # Laps without a stint (stints.json missing a driver or lagging behind laps.json) are kept with NaN stint fields.
+    if not stints.empty:
+        s = stints[['driver_number', 'stint_number', 'lap_start', 'lap_end', 'compound', 'tyre_age_at_start']]
+        pairs = laps[['driver_number', 'lap_number']].merge(s, on='driver_number')
+        in_stint = (pairs['lap_number'] >= pairs['lap_start']) & (pairs['lap_number'] <= pairs['lap_end'])
+        pairs = pairs[in_stint].sort_values('stint_number').drop_duplicates(['driver_number', 'lap_number'], keep='first')
+        laps = laps.merge(pairs, on=['driver_number', 'lap_number'], how='left')
+        # Age counts from the first lap actually run on the set (the out-lap), not the shared boundary lap
+        first_lap = laps.groupby(['driver_number', 'stint_number'])['lap_number'].transform('min')
+        laps['tyre_age'] = laps['tyre_age_at_start'] + laps['lap_number'] - first_lap
+        # The last lap of any stint that is followed by another one is an in-lap
+        last_stint = laps.groupby('driver_number')['stint_number'].transform('max')
+        laps['is_pit_in_lap'] = (laps['lap_number'] == laps['lap_end']) & (laps['stint_number'] < last_stint)
+        laps = laps.drop(columns=['lap_start', 'lap_end', 'tyre_age_at_start'])
+    else:
+        laps['stint_number'], laps['compound'], laps['tyre_age'], laps['is_pit_in_lap'] = np.nan, None, np.nan, False
+
+    return laps.sort_values(['driver_number', 'lap_number']).reset_index(drop=True)
+
+
+def build_lap_table(laps):
+    g = laps.groupby('driver_number')
+    median = g['lap_duration'].transform('median')
+    laps['is_clean'] = (
+        laps['lap_duration'].notna() & ~laps['is_pit_out_lap'] & ~laps['is_pit_in_lap']
+        & (laps['lap_duration'] <= median * CLEAN_LAP_CUTOFF)
+    )
+    # Running personal bests as the race goes on
+    for col in ['lap_duration'] + SECTORS:
+        laps[f"best_{col}"] = g[col].cummin()
+    laps['running_theoretical_best'] = laps[[f"best_{c}" for c in SECTORS]].sum(axis=1, min_count=3)
+    return laps
+
+
+def degradation(df, keys):
+    # Least-squares slope of lap time vs tyre age within each stint, pooled over `keys`:
+    # sum((age - mean_age) * (time - mean_time)) / sum((age - mean_age)^2), means taken per stint
+    stint_keys = ['driver_number', 'stint_number']
+    age_c = df['tyre_age'] - df.groupby(stint_keys)['tyre_age'].transform('mean')
+    time_c = df['lap_duration'] - df.groupby(stint_keys)['lap_duration'].transform('mean')
+    sums = pd.DataFrame({'sxy': age_c * time_c, 'sxx': age_c * age_c})
+    grouped = sums.groupby([df[k] for k in keys]).sum()
+    return (grouped['sxy'] / grouped['sxx'].replace(0, np.nan)).rename('deg_slope')
+
+
+def build_tables(laps):
+    laps = build_lap_table(laps)
+    clean = laps[laps['is_clean']]
+
+    stint_keys = ['driver_number', 'stint_number']
+    stints = laps.groupby(stint_keys).agg(
+        compound=('compound', 'last'), lap_start=('lap_number', 'min'), lap_end=('lap_number', 'max'), laps=('lap_number', 'size'))
+    pace = clean.groupby(stint_keys)['lap_duration'].agg(clean_laps='size', mean_pace='mean', median_pace='median', best_lap='min')
+    stints = stints.join(pace).join(degradation(clean, stint_keys)).reset_index()
+
+    drivers = laps.groupby('driver_number').agg(
+        laps=('lap_number', 'max'), best_lap=('lap_duration', 'min'),
+        best_sector_1=('duration_sector_1', 'min'), best_sector_2=('duration_sector_2', 'min'), best_sector_3=('duration_sector_3', 'min'))
+    drivers['best_lap_number'] = laps.loc[laps['lap_duration'].notna()].set_index('lap_number').groupby('driver_number')['lap_duration'].idxmin()
+    drivers['theoretical_best'] = drivers[['best_sector_1', 'best_sector_2', 'best_sector_3']].sum(axis=1, min_count=3)
+    drivers['lost_to_theoretical'] = drivers['best_lap'] - drivers['theoretical_best']
+    drivers = drivers.join(clean.groupby('driver_number')['lap_duration'].median().rename('median_clean_pace')).reset_index()
+
+    compounds = clean.groupby('compound').agg(clean_laps=('lap_duration', 'size'), median_pace=('lap_duration', 'median'), best_lap=('lap_duration', 'min'))
+    compounds = compounds.join(degradation(clean, ['compound'])).reset_index()
+
+    return {"laps": laps, "stints": stints, "drivers": drivers, "compounds": compounds}
+
+
+def check_tables(tables):
+    """Consistency problems in built tables (empty list when fine); `python lapAnalytics.py <key>` exits 1 on any."""
+    problems = []
+    laps = tables["laps"]
+    multi_stint = laps.groupby('driver_number')['stint_number'].nunique() > 1
+    in_laps = laps[laps['is_pit_in_lap']]
+    if multi_stint.any() and in_laps.empty: problems.append("drivers with several stints but no in-laps")
+
+    # An in-lap is still on the old set, so the lap after it belongs to a later stint
+    next_stint = laps.groupby('driver_number')['stint_number'].shift(-1).loc[in_laps.index]
+    if (next_stint <= in_laps['stint_number']).any(): problems.append("in-laps assigned to the stint after the stop")
+    if (laps['tyre_age'] < 0).any(): problems.append("negative tyre age")
+    return problems
+
+
+def to_table(df):
+    # Compact JSON: column names once + row arrays, 3 decimals, NaN -> null
+    df = df.round(3).astype(object).where(df.notna(), None)
+    return {"columns": list(df.columns), "data": df.to_numpy().tolist()}
+
+
+def compute_analytics(base_path):
+    tables = build_tables(load_laps(base_path))
+    return {name: to_table(df) for name, df in tables.items()}
+
+
+def get_analytics(base_path):
+    """Cached analytics for a session; recomputed only when laps.json / stints.json change."""
+    sig = source_signature(base_path)
+    cache_path = f"{base_path}/{CACHE_FILE}"
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path) as f: cached = json.load(f)
+            if cached.get("version") == CACHE_VERSION and cached.get("sources") == sig: return cached
+        except (OSError, ValueError):
+            pass
+
+    cached = {"version": CACHE_VERSION, "sources": sig, "tables": compute_analytics(base_path)}
+    # Write-then-rename so concurrent requests never read a half-written cache; one temp name per thread
+    tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "w") as f: json.dump(cached, f, separators=(",", ":"))
+        os.replace(tmp_path, cache_path)
+    except BaseException:
+        if os.path.exists(tmp_path): os.remove(tmp_path)
+        raise
+    return cached
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    session_key = sys.argv[1] if len(sys.argv) > 1 else 9523
+    start = time.perf_counter()
+    tables = build_tables(load_laps(f"race_data_{session_key}"))
+    print(f"Computed in {(time.perf_counter() - start) * 1000:.1f} ms")
+    with pd.option_context('display.width', 200, 'display.max_columns', 20):
+        for name in ["drivers", "compounds"]:
+            print(f"\n--- {name} ---")
+            print(tables[name].round(3).to_string(index=False))
+
+    laps = tables["laps"]
+    in_laps = laps[laps['is_pit_in_lap']]
+    print(f"\n{len(in_laps)} in-laps, compounds: {in_laps['compound'].value_counts().to_dict()}")
+    problems = check_tables(tables)
+    for p in problems: print(f"CHECK FAILED: {p}")
+    if problems: sys.exit(1)
@@ -0,0 +1,182 @@
+import asyncio
+import os
+from collections import deque
+from datetime import datetime, timedelta, timezone
+
+import requests
+
+# Live-session ingestion.
+# Polls OpenF1's location / position / intervals endpoints with a `date>` cursor per endpoint, so each
+# request only returns recent samples. The first poll starts SEED_LOOKBACK before now instead of at the
+# start of the session (except for the small `position` feed). After that the cursor trails the newest
+# sample by CURSOR_LAG so samples that arrive late for one driver are still picked up, and anything
+# already seen for that driver is skipped.
+#
+# Location samples go into a ring buffer per driver. Frames are rendered RENDER_DELAY_MS behind the
+# newest sample and interpolated between buffered samples, so cars move every FRAME_INTERVAL even
+# though the feed only arrives once per poll. Each frame uses the same "t|DriverID,X,Y,Position|..."
+# format as the replay stream and goes to every subscriber's bounded queue (oldest frame dropped when
+# a client falls behind). New intervals are sent as a "t|GAPS|DriverID,GapToLeader,Interval|..." line.
+
+OPENF1_BASE_URL = os.environ.get("OPENF1_BASE_URL", "https://api.openf1.org/v1")
+POLL_INTERVAL = 1.0 # seconds between polling rounds
+FRAME_INTERVAL = 0.1
+RING_SIZE = 600 # location samples kept per driver (~2.5 min at OpenF1's ~3.7 Hz)
+QUEUE_SIZE = 10 # frames buffered per client -> at most ~1s behind
+REQUEST_TIMEOUT = 10
+SEED_LOOKBACK = timedelta(seconds=10) # history fetched by the first poll
+CURSOR_LAG = timedelta(seconds=5) # re-request window for late samples
+RENDER_DELAY_MS = 1500 # frames trail the newest sample by this much so there is a sample on both sides
+MAX_CLOCK_DRIFT_MS = 5000 # resync the frame clock if it ends up this far from RENDER_DELAY_MS behind
+
+ENDPOINTS = ["location", "position", "intervals"]
+FULL_HISTORY = {"position"} # only sent on changes (a few hundred rows a race), so the first poll takes all of it
+
+
+def parse_date(value):
+    return datetime.fromisoformat(value)
+
+
+def position_at(buf, t):
+    # Linear interpolation between the buffered samples around t; holds the newest sample past the end
+    nxt = buf[-1]
+    if t >= nxt[0]: return nxt[1], nxt[2]
+    for prev in reversed(buf):
+        if prev[0] <= t:
+            f = (t - prev[0]) / (nxt[0] - prev[0])
+            return prev[1] + f * (nxt[1] - prev[1]), prev[2] + f * (nxt[2] - prev[2])
+        nxt = prev
+    return nxt[1], nxt[2]
+
+
+def fmt_gap(value):
+    # Seconds, or OpenF1's "+1 LAP" strings as they are
+    if value is None: return ""
+    if isinstance(value, (int, float)): return f"{value:.3f}"
+    return str(value)
+
+
+class LiveSession:
+    def __init__(self, session_key, base_url=OPENF1_BASE_URL, dropped_frames=None):
+        self.session_key = session_key
+        self.base_url = base_url
+        self.dropped_frames = dropped_frames # metrics.Counter, counted per frame dropped for a slow client
+        self.seed_dt = None # start of the first poll's window
+        self.newest = {name: {} for name in ENDPOINTS} # endpoint -> driver -> date of the newest sample seen
+        self.start_dt = None # first location sample defines t=0
+        self.locations = {} # driver -> deque[(t_ms, x, y)]
+        self.latest = {name: {} for name in ENDPOINTS if name != "location"} # endpoint -> driver -> row
+        self.gaps_changed = False
+        self.subscribers = set()
+        self.tasks = []
+        self.render_t = None
+        self.last_sent_t = None
+
+    # --- Ingestion ---
+    def cursor(self, endpoint):
+        newest = self.newest[endpoint]
+        if newest: return (max(newest.values()) - CURSOR_LAG).isoformat()
+        return None if endpoint in FULL_HISTORY else self.seed_dt.isoformat()
+
+    def fetch(self, endpoint):
+        params = {"session_key": self.session_key}
+        cursor = self.cursor(endpoint)
+        if cursor: params["date>"] = cursor
+        res = requests.get(f"{self.base_url}/{endpoint}", params=params, timeout=REQUEST_TIMEOUT)
+        if res.status_code != 200: return []
+        return res.json()
+
+    def ingest(self, endpoint, rows):
+        rows.sort(key=lambda r: r['date'])
+        newest = self.newest[endpoint]
+        added = 0
+        for r in rows:
+            d_id, date = r['driver_number'], parse_date(r['date'])
+            # The lagged cursor re-delivers recent rows; keep only what is newer than this driver's last
+            if d_id in newest and date <= newest[d_id]: continue
+            newest[d_id] = date
+            added += 1
+
+            if endpoint == "location":
+                if self.start_dt is None: self.start_dt = date
+                t = int((date - self.start_dt).total_seconds() * 1000)
+                self.locations.setdefault(d_id, deque(maxlen=RING_SIZE)).append((t, r['x'], r['y']))
+            else:
+                self.latest[endpoint][d_id] = r
+                if endpoint == "intervals": self.gaps_changed = True
+        return added
+
+    async def poll_once(self):
+        for endpoint in ENDPOINTS:
+            try:
+                rows = await asyncio.to_thread(self.fetch, endpoint)
+            except (requests.RequestException, ValueError) as e:
+                print(f"Live poll {endpoint} failed: {e}")
+                continue
+            self.ingest(endpoint, rows)
+
+    async def poll_loop(self):
+        while True:
+            await self.poll_once()
+            await asyncio.sleep(POLL_INTERVAL)
+
+    # --- Streaming ---
+    def advance_clock(self):
+        # Steps of FRAME_INTERVAL, never past the newest sample; resyncs after stalls or jumps
+        newest = max(buf[-1][0] for buf in self.locations.values() if buf)
+        target = newest - RENDER_DELAY_MS
+        if self.render_t is None or abs(target - self.render_t) > MAX_CLOCK_DRIFT_MS:
+            self.render_t = target
+        else:
+            self.render_t = min(self.render_t + int(FRAME_INTERVAL * 1000), newest)
+        return self.render_t
+
+    def encode_frame(self):
+        if not self.locations: return None
+        t = self.advance_clock()
+        if t == self.last_sent_t: return None
+        self.last_sent_t = t
+
+        positions = self.latest["position"]
+        msg = [str(t)]
+        for d_id, buf in self.locations.items():
+            if not buf: continue
+            x, y = position_at(buf, t)
+            msg.append(f"{d_id},{int(x)},{int(y)},{int(positions.get(d_id, {}).get('position') or 0)}")
+        return "|".join(msg)
+
+    def encode_gaps(self):
+        if not self.gaps_changed or self.last_sent_t is None: return None
+        self.gaps_changed = False
+        msg = [str(self.last_sent_t), "GAPS"]
+        for d_id, r in self.latest["intervals"].items():
+            msg.append(f"{d_id},{fmt_gap(r.get('gap_to_leader'))},{fmt_gap(r.get('interval'))}")
+        return "|".join(msg)
+
+    def publish(self, frame):
+        for q in self.subscribers:
+            if q.full():
+                q.get_nowait() # drop the oldest so latency stays bounded
+                if self.dropped_frames: self.dropped_frames.inc(session=f"live_{self.session_key}")
+            q.put_nowait(frame)
+
+    async def frame_loop(self):
+        while True:
+            for frame in (self.encode_frame(), self.encode_gaps()):
+                if frame: self.publish(frame)
+            await asyncio.sleep(FRAME_INTERVAL)
+
+    def subscribe(self):
+        q = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.subscribers.add(q)
+        if not self.tasks:
+            if self.seed_dt is None: self.seed_dt = datetime.now(timezone.utc) - SEED_LOOKBACK
+            self.tasks = [asyncio.create_task(self.poll_loop()), asyncio.create_task(self.frame_loop())]
+        return q
+
+    def unsubscribe(self, q):
+        self.subscribers.discard(q)
+        # Stop polling OpenF1 once nobody is watching
+        if not self.subscribers:
+            for task in self.tasks: task.cancel()
+            self.tasks = []
@@ -0,0 +1,114 @@
+import argparse
+import glob
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+from fastapi import FastAPI, Request
+
+# Local stand-in for the OpenF1 live endpoints, replaying a recorded session as if it were happening now.
+# The race clock starts when the stub starts (optionally sped up) and every sample's date is moved onto
+# the wall clock, so the live poller's "now minus a few seconds" first cursor works the same as against
+# OpenF1. Every request only sees samples up to the current race time and honours `date>`.
+#
+#   python liveStub.py 9523 --port 8001 --speed 5
+#   OPENF1_BASE_URL=http://127.0.0.1:8001/v1 python server.py
+#   -> connect to ws://127.0.0.1:8000/ws/live/9523
+
+# --- Configuration ---
+SESSION_KEY = 9523
+STUB_PORT = 8001
+SPEED_FACTOR = 1.0
+
+app = FastAPI()
+feeds = {} # endpoint -> (sorted race offsets in us, DataFrame of rows without their date)
+clock = {"wall_start": time.time(), "speed": SPEED_FACTOR, "session_key": SESSION_KEY}
+
+
+def load_feeds(session_key):
+    base = f"race_data_{session_key}"
+    with open(f"{base}/race_metadata.json") as f: start_dt = pd.Timestamp(json.load(f)["reference_start_time"])
+
+    frames = []
+    for path in glob.glob(f"{base}/telemetry/*.csv"):
+        df = pd.read_csv(path)
+        df['driver_number'] = int(os.path.basename(path).split('_')[1].split('.')[0])
+        frames.append(df)
+    tel = pd.concat(frames, ignore_index=True)
+    tel['date'] = start_dt + pd.to_timedelta(tel['time_offset'], unit='ms')
+
+    # The merged CSV repeats the latest interval on every row; OpenF1 only sends changes
+    tel = tel.sort_values(['driver_number', 'date'])
+    gaps = tel[['gap_to_leader', 'interval']].astype(str) # "+1 LAP" rows make these mixed types
+    changed = gaps.ne(gaps.groupby(tel['driver_number']).shift()).any(axis=1)
+    for col in ['gap_to_leader', 'interval']:
+        # Numbers as numbers, like OpenF1; only the "+N LAP(S)" strings stay strings
+        numeric = pd.to_numeric(tel[col], errors='coerce')
+        tel[col] = numeric.astype(object).where(numeric.notna(), tel[col])
+
+    with open(f"{base}/positions.json") as f: positions = pd.DataFrame(json.load(f))
+    positions['date'] = pd.to_datetime(positions['date'], format='ISO8601')
+
+    raw = {
+        "location": tel[['date', 'driver_number', 'x', 'y']],
+        "car_data": tel[['date', 'driver_number', 'speed', 'rpm', 'n_gear', 'throttle', 'brake', 'drs']],
+        "intervals": tel.loc[changed, ['date', 'driver_number', 'gap_to_leader', 'interval']],
+        "position": positions[['date', 'driver_number', 'position']],
+    }
+    for name, df in raw.items():
+        df = df.sort_values('date').reset_index(drop=True)
+        offsets = ((df['date'] - start_dt) // pd.Timedelta(microseconds=1)).to_numpy(dtype=np.int64)
+        df = df.drop(columns='date')
+        df['session_key'] = session_key
+        df = df.astype(object).where(df.notna(), None) # NaN is not valid JSON
+        feeds[name] = (offsets, df)
+
+    clock["session_key"] = session_key
+
+
+def race_offset_us(wall_ts):
+    return int((wall_ts - clock["wall_start"]) * clock["speed"] * 1_000_000)
+
+
+def wall_date(offset_us):
+    return datetime.fromtimestamp(clock["wall_start"] + offset_us / 1_000_000 / clock["speed"], tz=timezone.utc).isoformat()
+
+
+def feed_rows(name, request: Request):
+    offsets, df = feeds[name]
+    hi = np.searchsorted(offsets, race_offset_us(time.time()), side='right')
+    lo = 0
+    cursor = request.query_params.get("date>")
+    if cursor:
+        lo = np.searchsorted(offsets, race_offset_us(datetime.fromisoformat(cursor).timestamp()), side='right')
+
+    driver = request.query_params.get("driver_number")
+    keep = range(lo, hi) if not driver else [i for i in range(lo, hi) if df.at[i, 'driver_number'] == int(driver)]
+    rows = df.iloc[list(keep)].to_dict(orient="records")
+    for i, r in zip(keep, rows): r['date'] = wall_date(int(offsets[i]))
+    return rows
+
+
+@app.get("/v1/{endpoint}")
+def get_feed(endpoint: str, request: Request):
+    if endpoint not in feeds: return []
+    return feed_rows(endpoint, request)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Replay a recorded session as a fake live OpenF1 API")
+    parser.add_argument("session_key", nargs="?", default=SESSION_KEY)
+    parser.add_argument("--port", type=int, default=STUB_PORT)
+    parser.add_argument("--speed", type=float, default=SPEED_FACTOR, help="race seconds per wall second")
+    args = parser.parse_args()
+
+    print(f"Loading session {args.session_key} for live replay...")
+    load_feeds(args.session_key)
+    clock["speed"] = args.speed
+    clock["wall_start"] = time.time()
+    uvicorn.run(app, host="127.0.0.1", port=args.port)
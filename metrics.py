@@ -0,0 +1,141 @@
+import threading
+import time
+import sys
+import os
+from collections import Counter as StackCounter
+
+# Minimal Prometheus text-format metrics (no client library needed on the VPS).
+# Each metric keeps one value per label tuple; render() produces the /metrics payload.
+
+def escape(value):
+    # Label values are quoted; backslash, quote and newline must be escaped
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def key(self, label_values):
+        return tuple(str(label_values.get(l, "")) for l in self.labels)
+
+    def fmt_labels(self, key, extra=""):
+        parts = [f'{l}="{escape(v)}"' for l, v in zip(self.labels, key)]
+        if extra: parts.append(extra)
+        return "{" + ",".join(parts) + "}" if parts else ""
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        with self.lock:
+            for key, v in self.values.items():
+                lines.append(f"{self.name}{self.fmt_labels(key)} {v}")
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        k = self.key(labels)
+        with self.lock: self.values[k] = self.values.get(k, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self.lock: self.values[self.key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        k = self.key(labels)
+        with self.lock: self.values[k] = self.values.get(k, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+    DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        k = self.key(labels)
+        with self.lock:
+            # [bucket counts..., sum, count]
+            state = self.values.setdefault(k, [0] * len(self.buckets) + [0.0, 0])
+            for i, b in enumerate(self.buckets):
+                if value <= b: state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        with self.lock:
+            for key, state in self.values.items():
+                for b, c in zip(self.buckets + ("+Inf",), state[:len(self.buckets)] + [state[-1]]):
+                    le = 'le="%s"' % b
+                    lines.append(f"{self.name}_bucket{self.fmt_labels(key, le)} {c}")
+                lines.append(f"{self.name}_sum{self.fmt_labels(key)} {state[-2]}")
+                lines.append(f"{self.name}_count{self.fmt_labels(key)} {state[-1]}")
+        return lines
+
+
+REGISTRY = []
+
+def register(metric):
+    REGISTRY.append(metric)
+    return metric
+
+
+def resident_memory_bytes():
+    # Linux only; falls back to 0 elsewhere
+    try:
+        with open("/proc/self/statm") as f: return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+def render_all():
+    lines = []
+    for m in REGISTRY: lines.extend(m.render())
+    lines.append("# HELP process_resident_memory_bytes Resident memory size in bytes.")
+    lines.append("# TYPE process_resident_memory_bytes gauge")
+    lines.append(f"process_resident_memory_bytes {resident_memory_bytes()}")
+    return "\n".join(lines) + "\n"
+
+
+# ==========================================
+# Sampling Profiler
+# ==========================================
+# Samples every thread's Python stack at a fixed interval and returns "collapsed" stacks
+# (frame;frame;frame count), which flamegraph.pl / speedscope / inferno render directly.
+# Because the tick loop runs on the event loop thread, profiling while clients are
+# connected shows exactly where a frame's budget goes.
+
+def sample_stacks(seconds, interval=0.005):
+    own_id = threading.get_ident()
+    stacks = StackCounter()
+    deadline = time.perf_counter() + seconds
+
+    while time.perf_counter() < deadline:
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id: continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            stacks[";".join(reversed(names))] += 1
+        time.sleep(interval)
+
+    return "\n".join(f"{stack} {count}" for stack, count in stacks.most_common()) + "\n"
@@ -0,0 +1,165 @@
+import pandas as pd
+import numpy as np
+from datetime import datetime, timedelta
+import json
+import os
+
+# Sparse race-state timeline, precomputed once per session.
+#
+#   leaderboard_changes: {tick_ms: [driver_number, ...]}  (only ticks where the order changes)
+#   events:              {tick_ms: ["OVERTAKE,44,16", "PIT_IN,1,22", ...]}
+#
+# Event strings (comma separated, first field is the type):
+#   OVERTAKE,<driver>,<passed_driver>
+#   PIT_IN,<driver>,<lap>
+#   PIT_OUT,<driver>,<lap>,<compound>
+#   FASTEST_LAP,<driver>,<lap>,<lap_time>
+#   RETIRED,<driver>,<laps_completed>
+#
+# Order swaps involving a car that is between its PIT_IN and PIT_OUT are not overtakes (pit stops,
+# red-flag tyre changes), so those are left out of the OVERTAKE events. Neither are swaps where one
+# car jumps past (or drops behind) more than MAX_SWAPS_PER_CAR others in a single change: that is a
+# reorder (red-flag queue, pit lane, data gap), not racing.
+
+MAX_SWAPS_PER_CAR = 2
+PIT_ENTRY_LEAD_MS = 20000 # PIT_IN is the line crossing in the pit lane; the car leaves the track before that
+
+
+def load_json(base_path, name, default):
+    path = f"{base_path}/{name}.json"
+    if not os.path.exists(path): return default
+    with open(path, "r") as f: return json.load(f)
+
+
+def to_tick(dt, start_dt, step_ms):
+    # Snap an absolute timestamp onto the next frame tick so the event is never sent early
+    offset_ms = (dt - start_dt).total_seconds() * 1000
+    return max(0, int(np.ceil(offset_ms / step_ms)) * step_ms)
+
+
+def pit_windows(events):
+    """{driver: [(pit_entry_tick, pit_out_tick), ...]} from the PIT_IN / PIT_OUT events."""
+    windows, entered = {}, {}
+    for t in sorted(events):
+        for evt in events[t]:
+            kind, d_num = evt.split(",")[:2]
+            if kind == "PIT_IN": entered[int(d_num)] = t - PIT_ENTRY_LEAD_MS
+            elif kind == "PIT_OUT" and int(d_num) in entered:
+                windows.setdefault(int(d_num), []).append((entered.pop(int(d_num)), t))
+    return windows
+
+
+def in_pit(windows, d_num, t):
+    return any(start <= t <= end for start, end in windows.get(d_num, ()))
+
+
+def build_leaderboard(drivers_data, max_time, step_ms, windows=None):
+    """Order drivers on every tick and keep only the ticks where it changes.
+
+    Uses the track-projected `calc_position` when the session has one, the telemetry `position` otherwise.
+    """
+    if not drivers_data: return {}, {}
+
+    d_ids = np.array(list(drivers_data.keys()))
+    ticks = np.arange(0, int(max_time) + 1, step_ms)
+
+    # Rows = ticks, columns = drivers. Missing / 0 positions sort to the back.
+    pos = np.full((len(ticks), len(d_ids)), 999, dtype=np.int16)
+    for col, df in enumerate(drivers_data.values()):
+        p = df['calc_position' if 'calc_position' in df.columns else 'position'].reindex(ticks).to_numpy(dtype=float, na_value=0)
+        pos[:, col] = np.where(p > 0, p, 999)
+
+    order = np.argsort(pos, axis=1, kind='stable')
+    changed = np.ones(len(ticks), dtype=bool)
+    changed[1:] = (order[1:] != order[:-1]).any(axis=1)
+
+    leaderboard_changes = {int(ticks[i]): d_ids[order[i]].tolist() for i in np.flatnonzero(changed)}
+
+    # Overtakes: pairs that swap relative order between two consecutive changes, neither car in the pits
+    windows = windows or {}
+    events = {}
+    ranks = np.argsort(order, axis=1)
+    idx = np.flatnonzero(changed)
+    for prev_i, i in zip(idx[:-1], idx[1:]):
+        prev_r, new_r = ranks[prev_i], ranks[i]
+        passed = (prev_r[:, None] > prev_r[None, :]) & (new_r[:, None] < new_r[None, :])
+        bulk = (passed.sum(axis=1) > MAX_SWAPS_PER_CAR)[:, None] | (passed.sum(axis=0) > MAX_SWAPS_PER_CAR)[None, :]
+        passed &= ~bulk
+        for a, b in zip(*np.nonzero(passed)):
+            if in_pit(windows, d_ids[a], ticks[i]) or in_pit(windows, d_ids[b], ticks[i]): continue
+            events.setdefault(int(ticks[i]), []).append(f"OVERTAKE,{d_ids[a]},{d_ids[b]}")
+
+    return leaderboard_changes, events
+
+
+def build_lap_events(base_path, start_dt, step_ms):
+    """Pit in/out, fastest lap and retirement events from laps.json, stints.json and session_result.json."""
+    events = {}
+    def add(dt, evt): events.setdefault(to_tick(dt, start_dt, step_ms), []).append(evt)
+
+    laps_df = pd.DataFrame(load_json(base_path, "laps", []))
+    stints = load_json(base_path, "stints", [])
+    results = load_json(base_path, "session_result", [])
+    if laps_df.empty: return events
+
+    laps_df['date_start'] = pd.to_datetime(laps_df['date_start'], format='ISO8601')
+    laps_df['date_end'] = laps_df['date_start'] + pd.to_timedelta(laps_df['lap_duration'], unit='s')
+    lap_lookup = laps_df.set_index(['driver_number', 'lap_number'])
+
+    # A. Fastest Lap (running minimum in the order laps are completed)
+    timed = laps_df.dropna(subset=['lap_duration', 'date_end']).sort_values('date_end')
+    best = np.inf
+    for lap in timed.itertuples():
+        if lap.lap_duration < best:
+            best = lap.lap_duration
+            add(lap.date_end, f"FASTEST_LAP,{lap.driver_number},{lap.lap_number},{lap.lap_duration}")
+
+    # B. Pit Stops (a stint ending before the driver's last stint = in-lap, next lap = out-lap)
+    stints = sorted(stints, key=lambda s: (s['driver_number'], s['stint_number']))
+    for s, nxt in zip(stints, stints[1:]):
+        if s['driver_number'] != nxt['driver_number']: continue
+        d_num, out_lap = s['driver_number'], s['lap_end'] + 1
+        if (d_num, out_lap) not in lap_lookup.index: continue
+        out = lap_lookup.loc[(d_num, out_lap)]
+
+        # Crossing the line in the pit lane ends the in-lap; pit exit is approximated as end of out-lap S1
+        add(out['date_start'], f"PIT_IN,{d_num},{s['lap_end']}")
+        pit_out_dt = out['date_start']
+        if pd.notna(out.get('duration_sector_1')): pit_out_dt += timedelta(seconds=out['duration_sector_1'])
+        add(pit_out_dt, f"PIT_OUT,{d_num},{out_lap},{nxt['compound']}")
+
+    # C. Retirements (last timing line we have for a DNF driver)
+    for r in results:
+        if not r.get('dnf'): continue
+        d_laps = laps_df[laps_df['driver_number'] == r['driver_number']]
+        if d_laps.empty: continue
+        last = d_laps.sort_values('date_start').iloc[-1]
+        last_dt = last['date_end'] if pd.notna(last['date_end']) else last['date_start']
+        add(last_dt, f"RETIRED,{r['driver_number']},{r.get('number_of_laps') or 0}")
+
+    return events
+
+
+def finish_ticks(base_path, step_ms):
+    """{driver: tick} at which each driver's last timed lap ends (chequered flag, or retirement)."""
+    meta = load_json(base_path, "race_metadata", {})
+    laps_df = pd.DataFrame(load_json(base_path, "laps", []))
+    if laps_df.empty or not meta.get('reference_start_time'): return {}
+
+    start_dt = datetime.fromisoformat(meta['reference_start_time'])
+    laps_df['date_end'] = pd.to_datetime(laps_df['date_start'], format='ISO8601') + pd.to_timedelta(laps_df['lap_duration'], unit='s')
+    last = laps_df.dropna(subset=['date_end']).sort_values('lap_number').groupby('driver_number').tail(1)
+    return {int(r.driver_number): to_tick(r.date_end, start_dt, step_ms) for r in last.itertuples()}
+
+
+def build_timeline(base_path, drivers_data, max_time, step_ms):
+    meta = load_json(base_path, "race_metadata", {})
+    lap_events = {}
+    if meta.get('reference_start_time'):
+        lap_events = build_lap_events(base_path, datetime.fromisoformat(meta['reference_start_time']), step_ms)
+
+    leaderboard_changes, events = build_leaderboard(drivers_data, max_time, step_ms, pit_windows(lap_events))
+    for t, evts in lap_events.items():
+        events.setdefault(t, []).extend(evts)
+
+    return leaderboard_changes, dict(sorted(events.items()))
@@ -0,0 +1,188 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import time
+
+import numpy as np
+
+# Offline race replay renderer.
+# Loads a session once through SessionManager (same 100ms resample the server streams), turns it
+# into (ticks x drivers) arrays and moves every car with a single scatter.set_offsets() per frame.
+#
+#   python replayRenderer.py 9523 --out race.mp4 --fps 20 --speed 10 --start 300 --end 900
+#   python replayRenderer.py 9523 --out lap1.gif --end 120
+#   python replayRenderer.py 9523 --bench 500
+
+# --- Configuration ---
+SESSION_KEY = 9523
+OUTPUT_FPS = 20
+SPEED_FACTOR = 10 # race seconds per video second
+TRACK_PADDING = 1500
+
+
+def load_replay(session_key):
+    from server import SessionManager
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        session = SessionManager(str(session_key))
+    base = session.base_path
+    step = 100
+
+    d_ids = list(session.drivers_data.keys())
+    ticks = np.arange(0, int(session.max_time) + 1, step)
+    xs = np.full((len(ticks), len(d_ids)), np.nan, dtype=np.float32)
+    ys = np.full_like(xs, np.nan)
+    for col, df in enumerate(session.drivers_data.values()):
+        xs[:, col] = df['x'].reindex(ticks).to_numpy(dtype=np.float32, na_value=np.nan)
+        ys[:, col] = df['y'].reindex(ticks).to_numpy(dtype=np.float32, na_value=np.nan)
+
+    with open(f"{base}/drivers.json") as f: drivers = {d['driver_number']: d for d in json.load(f)}
+    with open(f"{base}/track_layout.json") as f: layout = json.load(f)
+
+    return {
+        "session_key": session_key,
+        "ticks": ticks,
+        "step": step,
+        "d_ids": d_ids,
+        "xy": np.stack([xs, ys], axis=2), # (ticks, drivers, 2)
+        "colors": [f"#{drivers.get(d, {}).get('team_colour') or '555555'}" for d in d_ids],
+        "acronyms": {d: drivers.get(d, {}).get('name_acronym', f"#{d}") for d in d_ids},
+        "leaderboard_changes": session.leaderboard_changes,
+        "layout": layout,
+    }
+
+
+def frame_indices(replay, fps, speed, start_sec=0, end_sec=None):
+    # Tick indices to render: one frame every (speed / fps) race seconds inside [start, end]
+    ticks = replay["ticks"]
+    stride = max(1, int(round(speed / fps * 1000 / replay["step"])))
+    first = np.searchsorted(ticks, start_sec * 1000)
+    last = len(ticks) if end_sec is None else np.searchsorted(ticks, end_sec * 1000, side='right')
+    return np.arange(first, last, stride)
+
+
+def leaderboard_text(replay, tick_ms):
+    # Latest leaderboard change at or before this tick
+    changes = replay["change_ticks"]
+    i = np.searchsorted(changes, tick_ms, side='right') - 1
+    if i < 0: return ""
+    order = replay["leaderboard_changes"][int(changes[i])]
+    return "\n".join(f"{p:>2} {replay['acronyms'].get(d, d)}" for p, d in enumerate(order[:10], 1))
+
+
+def build_figure(replay):
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(12, 8))
+    fig.patch.set_facecolor('#1a1a1a')
+    ax.set_facecolor('#1a1a1a')
+
+    layout = replay["layout"]
+    for path, width in [(layout.get("pit_path", []), 3), (layout.get("track_path", []), 8)]:
+        if path: ax.plot([p['x'] for p in path], [p['y'] for p in path], color='#333333', linewidth=width, zorder=1)
+
+    b = layout.get("bounds", {})
+    if any(b.values()):
+        ax.set_xlim(b["min_x"] - TRACK_PADDING, b["max_x"] + TRACK_PADDING)
+        ax.set_ylim(b["min_y"] - TRACK_PADDING, b["max_y"] + TRACK_PADDING)
+    else:
+        xy = replay["xy"].reshape(-1, 2)
+        ax.set_xlim(np.nanmin(xy[:, 0]) - TRACK_PADDING, np.nanmax(xy[:, 0]) + TRACK_PADDING)
+        ax.set_ylim(np.nanmin(xy[:, 1]) - TRACK_PADDING, np.nanmax(xy[:, 1]) + TRACK_PADDING)
+    ax.set_aspect('equal')
+    ax.axis('off')
+
+    cars = ax.scatter(replay["xy"][0, :, 0], replay["xy"][0, :, 1], c=replay["colors"], s=64, zorder=5)
+    time_text = ax.text(0.02, 0.96, '', transform=ax.transAxes, color='white', fontsize=14, fontfamily='monospace')
+    board_text = ax.text(0.02, 0.90, '', transform=ax.transAxes, color='white', fontsize=9, fontfamily='monospace', va='top')
+    return fig, cars, time_text, board_text
+
+
+def make_update(replay, cars, time_text, board_text):
+    replay["change_ticks"] = np.array(sorted(replay["leaderboard_changes"]), dtype=np.int64)
+    xy = replay["xy"]
+    ticks = replay["ticks"]
+
+    def update(frame_idx):
+        cars.set_offsets(xy[frame_idx])
+        t = int(ticks[frame_idx])
+        time_text.set_text(time.strftime('%H:%M:%S', time.gmtime(t / 1000)))
+        board_text.set_text(leaderboard_text(replay, t))
+        return cars, time_text, board_text
+    return update
+
+
+def render(replay, out_path, fps=OUTPUT_FPS, speed=SPEED_FACTOR, start_sec=0, end_sec=None):
+    import matplotlib
+    matplotlib.use("Agg")
+    from matplotlib.animation import FuncAnimation, FFMpegWriter, PillowWriter
+
+    frames = frame_indices(replay, fps, speed, start_sec, end_sec)
+    fig, cars, time_text, board_text = build_figure(replay)
+    update = make_update(replay, cars, time_text, board_text)
+
+    writer = PillowWriter(fps=fps) if out_path.lower().endswith(".gif") else FFMpegWriter(fps=fps)
+    ani = FuncAnimation(fig, update, frames=frames, blit=True)
+    start = time.perf_counter()
+    ani.save(out_path, writer=writer)
+    elapsed = time.perf_counter() - start
+    print(f"Saved {len(frames)} frames to {out_path} in {elapsed:.1f}s ({len(frames) / elapsed:.1f} frames/sec)")
+
+
+def benchmark(replay, n_frames=500, fps=OUTPUT_FPS, speed=SPEED_FACTOR):
+    # Update + draw to an off-screen Agg canvas; no encoder in the loop
+    import matplotlib
+    matplotlib.use("Agg")
+
+    fig, cars, time_text, board_text = build_figure(replay)
+    update = make_update(replay, cars, time_text, board_text)
+    frames = frame_indices(replay, fps, speed)[:n_frames]
+
+    start = time.perf_counter()
+    for i in frames: update(i)
+    update_sec = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in frames:
+        update(i)
+        fig.canvas.draw()
+    draw_sec = time.perf_counter() - start
+
+    return {
+        "frames": len(frames),
+        "drivers": len(replay["d_ids"]),
+        "update_frames_per_sec": len(frames) / update_sec,
+        "rendered_frames_per_sec": len(frames) / draw_sec,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render a race replay from local session data")
+    parser.add_argument("session_key", nargs="?", default=SESSION_KEY)
+    parser.add_argument("--out", help="output .mp4 (needs ffmpeg) or .gif")
+    parser.add_argument("--fps", type=int, default=OUTPUT_FPS)
+    parser.add_argument("--speed", type=float, default=SPEED_FACTOR, help="race seconds per video second")
+    parser.add_argument("--start", type=float, default=0, help="race time to start at (s)")
+    parser.add_argument("--end", type=float, default=None, help="race time to stop at (s)")
+    parser.add_argument("--bench", type=int, metavar="N", help="render N frames off-screen and report frames/sec")
+    args = parser.parse_args()
+
+    if not os.path.exists(f"race_data_{args.session_key}"):
+        print(f"No local data for session {args.session_key}")
+        exit()
+
+    replay = load_replay(args.session_key)
+    if args.bench:
+        print(json.dumps(benchmark(replay, args.bench, args.fps, args.speed), indent=4))
+    elif args.out:
+        render(replay, args.out, args.fps, args.speed, args.start, args.end)
+    else:
+        import matplotlib.pyplot as plt
+        from matplotlib.animation import FuncAnimation
+
+        fig, cars, time_text, board_text = build_figure(replay)
+        update = make_update(replay, cars, time_text, board_text)
+        ani = FuncAnimation(fig, update, frames=frame_indices(replay, args.fps, args.speed, args.start, args.end), blit=True, interval=1000 / args.fps)
+        plt.show()
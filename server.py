@@ -1,17 +1,73 @@
 from fastapi import FastAPI, WebSocket, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 import pandas as pd
 import os
 import json
 import asyncio
 import glob
+import time
+import numpy as np
 
+from raceTimeline import build_timeline, finish_ticks
+from liveSession import LiveSession
+import lapAnalytics
+from trackIndex import load_track_index, race_progress, race_order_and_gaps
+import metrics
 
 app = FastAPI()
 
 # --- CONFIG ---
 DATA_ROOT = "." 
 FRAME_INTERVAL = 0.1 # FPS
+GAPS_INTERVAL_MS = 1000 # how often the computed gaps / intervals are sent
+PROFILING_ENABLED = os.environ.get("PITWALL_PROFILING", "0") == "1"
+MAX_PROFILE_SECONDS = 60
+
+# Narrow per-tick dtypes (applied at load). Integer values are clipped to the type's range first.
+# Lapped cars have "+1 LAP" / "+2 LAPS" instead of a gap: the float columns keep NaN there and
+# the lap count goes into `laps_down`.
+COLUMN_DTYPES = {
+    'driver_number': 'uint8',
+    'x': 'int16', 'y': 'int16',
+    'speed': 'uint16', 'rpm': 'uint16',
+    'n_gear': 'uint8', 'throttle': 'uint8', 'brake': 'uint8', 'drs': 'uint8',
+    'gap_to_leader': 'float32', 'interval': 'float32',
+    'position': 'uint8', 'lap_number': 'uint8', 'tyre_age': 'uint8', 'laps_down': 'uint8',
+    'sector_1': 'float32', 'sector_2': 'float32', 'sector_3': 'float32', 'lap_time': 'float32',
+    'compound': 'category',
+}
+
+# --- METRICS ---
+LOAD_SECONDS = metrics.register(metrics.Gauge("pitwall_session_load_seconds", "Time to load and resample one driver's telemetry.", ["session", "driver"]))
+ENCODE_SECONDS = metrics.register(metrics.Histogram("pitwall_frame_encode_seconds", "Time to build one position frame.", ["session"]))
+SEND_SECONDS = metrics.register(metrics.Histogram("pitwall_frame_send_seconds", "Time to hand one frame to the websocket.", ["session"]))
+ACTIVE_SOCKETS = metrics.register(metrics.Gauge("pitwall_active_sockets", "Connected websocket clients.", ["session"]))
+DROPPED_FRAMES = metrics.register(metrics.Counter("pitwall_dropped_frames_total", "Frames whose encode + send overran the frame interval (replay) or that were dropped for a slow client (live).", ["session"]))
+SESSION_MEMORY = metrics.register(metrics.Gauge("pitwall_session_memory_bytes", "Memory held by a SessionManager's driver DataFrames.", ["session"]))
+
+def laps_down(gaps):
+    # "+2 LAPS" -> 2, numeric gaps -> 0
+    if pd.api.types.is_numeric_dtype(gaps): return pd.Series(0, index=gaps.index)
+    return pd.to_numeric(gaps.astype(str).str.extract(r'^\+(\d+) LAP', expand=False), errors='coerce').fillna(0)
+
+def narrow_dtypes(df, name=""):
+    if 'gap_to_leader' in df.columns: df['laps_down'] = laps_down(df['gap_to_leader'])
+    for col, dtype in COLUMN_DTYPES.items():
+        if col not in df.columns: continue
+        if dtype == 'category':
+            # fillna(0) leaves 0 where there was no compound
+            df[col] = df[col].where(df[col].ne(0), "").astype('category')
+        elif dtype.startswith('float'):
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype(dtype)
+        else:
+            info = np.iinfo(dtype)
+            # Truncate like int() does when the frame is encoded
+            values = np.trunc(pd.to_numeric(df[col], errors='coerce').fillna(0).to_numpy(dtype=float))
+            clipped = np.clip(values, info.min, info.max)
+            n_clipped = int((clipped != values).sum())
+            if n_clipped: print(f"Warning: {name} {col} has {n_clipped} values outside {dtype}, clipped")
+            df[col] = clipped.astype(dtype)
+    return df
 
 class SessionManager:
     def __init__(self, session_key):
@@ -19,7 +75,12 @@ class SessionManager:
         self.base_path = f"{DATA_ROOT}/race_data_{session_key}"
         self.drivers_data = {} 
         self.max_time = 0
+        self.leaderboard_changes = {}
+        self.events = {}
+        self.track_index = None
         self.load_data()
+        self.load_track_positions()
+        self.load_timeline()
 
     def load_data(self):
         print(f"Loading Session {self.session_key}...")
@@ -27,6 +88,7 @@ class SessionManager:
         
         csv_files = glob.glob(f"{telemetry_path}/*.csv")
         for f in csv_files:
+            load_start = time.perf_counter()
             try:
                 d_id = int(os.path.basename(f).split('_')[1].split('.')[0])
                 df = pd.read_csv(f)
@@ -68,15 +130,106 @@ class SessionManager:
                 
                 # G. Final Cleanup
                 df = df.fillna(0)
+                df = narrow_dtypes(df, os.path.basename(f))
                 
                 self.drivers_data[d_id] = df
+                LOAD_SECONDS.set(time.perf_counter() - load_start, session=self.session_key, driver=d_id)
                 
             except Exception as e:
                 print(f"Error loading {f}: {e}")
         
-        print(f"Loaded {len(self.drivers_data)} drivers. Max time: {self.max_time/1000/60:.2f} min")
+        SESSION_MEMORY.set(self.memory_bytes(), session=self.session_key)
+        print(f"Loaded {len(self.drivers_data)} drivers. Max time: {self.max_time/1000/60:.2f} min. Memory: {self.memory_bytes()/1024/1024:.1f} MB")
+
+    def memory_bytes(self):
+        return int(sum(df.memory_usage(deep=True).sum() for df in self.drivers_data.values()))
+
+    def memory_report(self):
+        # Bytes per column summed over all drivers, plus the per-driver totals
+        columns = {}
+        drivers = {}
+        for d_id, df in self.drivers_data.items():
+            usage = df.memory_usage(deep=True)
+            drivers[d_id] = int(usage.sum())
+            for col, n in usage.items():
+                columns[col] = columns.get(col, 0) + int(n)
+        dtypes = {}
+        if self.drivers_data:
+            dtypes = {col: str(dt) for col, dt in next(iter(self.drivers_data.values())).dtypes.items()}
+        return {
+            "session_key": self.session_key,
+            "total_bytes": self.memory_bytes(),
+            "ticks": int(sum(len(df) for df in self.drivers_data.values())),
+            "columns": {col: {"bytes": n, "dtype": dtypes.get(col, "index")} for col, n in columns.items()},
+            "drivers": drivers,
+        }
+
+    def load_track_positions(self):
+        # Order / gap / interval from projecting every car onto the racing line, on every tick.
+        # The order replaces the coarse telemetry `position` in the leaderboard; gaps feed the GAPS lines.
+        # Frames keep the official `position`.
+        try:
+            self.track_index = load_track_index(self.base_path)
+        except Exception as e:
+            print(f"Error building track index: {e}")
+            return
+        if not self.drivers_data: return
+
+        step = int(FRAME_INTERVAL * 1000)
+        ticks = np.arange(0, int(self.max_time) + 1, step)
+        distance = np.empty((len(ticks), len(self.drivers_data)))
+        for col, df in enumerate(self.drivers_data.values()):
+            # Drivers whose data ends early hold their last position
+            x = df['x'].reindex(ticks).ffill().to_numpy(dtype=float)
+            y = df['y'].reindex(ticks).ffill().to_numpy(dtype=float)
+            distance[:, col], _ = self.track_index.project(x, y)
+
+        # Cars are held on the line from the end of their last lap (flag or retirement)
+        finished = finish_ticks(self.base_path, step)
+        finish_idx = [finished.get(d_id, len(ticks) * step) // step for d_id in self.drivers_data]
+        position, gap, interval = race_order_and_gaps(race_progress(distance, self.track_index.length), ticks, finish_idx, self.track_index.length)
+        for col, (d_id, df) in enumerate(self.drivers_data.items()):
+            n = len(df)
+            df['calc_position'] = position[:n, col].astype('uint8')
+            df['calc_gap_to_leader'] = gap[:n, col].astype('float32')
+            df['calc_interval'] = interval[:n, col].astype('float32')
+        SESSION_MEMORY.set(self.memory_bytes(), session=self.session_key)
+
+    def load_timeline(self):
+        # Leaderboard order + race events, sent sparsely alongside the position frames
+        try:
+            self.leaderboard_changes, self.events = build_timeline(self.base_path, self.drivers_data, self.max_time, int(FRAME_INTERVAL * 1000))
+        except Exception as e:
+            print(f"Error building timeline: {e}")
+
+        n_events = sum(len(v) for v in self.events.values())
+        print(f"Timeline: {len(self.leaderboard_changes)} leaderboard changes, {n_events} events")
+
+    def encode_frame(self, t):
+        # "t|DriverID,X,Y,Position|..." or None if no driver has data at t
+        msg = [str(t)]
+        for d_id, df in self.drivers_data.items():
+            if t in df.index:
+                # Scalar lookups: a full df.loc[t] row would upcast the mixed narrow dtypes to object
+                # Ensure we have valid coordinates (not 0,0)
+                # NOTE: We send even if 0,0 just to see if they exist
+                msg.append(f"{d_id},{int(df.at[t, 'x'])},{int(df.at[t, 'y'])},{int(df.at[t, 'position'])}")
+        return "|".join(msg) if len(msg) > 1 else None
+
+    def encode_gaps(self, t):
+        # "t|GAPS|DriverID,GapToLeader,Interval|..." in seconds, or None without computed gaps.
+        # Lapped cars send "+1 LAP" / "+2 LAPS" as the gap, like the live stream does.
+        msg = [str(t), "GAPS"]
+        for d_id, df in self.drivers_data.items():
+            if t in df.index and 'calc_gap_to_leader' in df.columns:
+                down = int(df.at[t, 'laps_down']) if 'laps_down' in df.columns else 0
+                gap = f"+{down} LAP{'S' if down > 1 else ''}" if down else f"{df.at[t, 'calc_gap_to_leader']:.3f}"
+                msg.append(f"{d_id},{gap},{df.at[t, 'calc_interval']:.3f}")
+        return "|".join(msg) if len(msg) > 2 else None
 
 active_sessions = {}
+live_sessions = {}
+analytics_cache = {} # session_key -> cached analytics document (checked against source files per request)
 
 def get_session(session_key: str):
     if session_key not in active_sessions:
@@ -84,12 +237,52 @@ def get_session(session_key: str):
         active_sessions[session_key] = SessionManager(session_key)
     return active_sessions[session_key]
 
+def get_live_session(session_key: str):
+    if session_key not in live_sessions:
+        live_sessions[session_key] = LiveSession(session_key, dropped_frames=DROPPED_FRAMES)
+    return live_sessions[session_key]
+
+def get_analytics(session_key: str):
+    base_path = f"{DATA_ROOT}/race_data_{session_key}"
+    if not os.path.exists(f"{base_path}/laps.json"): return None
+    cached = analytics_cache.get(session_key)
+    if cached is None or cached["sources"] != lapAnalytics.source_signature(base_path):
+        cached = analytics_cache[session_key] = lapAnalytics.get_analytics(base_path)
+    return cached
+
+@app.get("/session/{session_key}/analytics/{table}")
+def get_analytics_table(session_key: str, table: str):
+    if table not in lapAnalytics.TABLES: raise HTTPException(status_code=404, detail="Unknown table")
+    analytics = get_analytics(session_key)
+    if analytics is None: raise HTTPException(status_code=404, detail="Session not found")
+    return JSONResponse(content=analytics["tables"][table])
+
 @app.get("/session/{session_key}/{file_type}")
 def get_static_data(session_key: str, file_type: str):
+    # The analytics cache lives next to the session files but is served per table above
+    if f"{file_type}.json" == lapAnalytics.CACHE_FILE: raise HTTPException(status_code=404, detail="File not found")
     path = f"{DATA_ROOT}/race_data_{session_key}/{file_type}.json"
     if not os.path.exists(path): raise HTTPException(status_code=404, detail="File not found")
     with open(path, "r") as f: return JSONResponse(content=json.load(f))
 
+@app.get("/metrics")
+def get_metrics():
+    return PlainTextResponse(metrics.render_all(), media_type="text/plain; version=0.0.4")
+
+@app.get("/debug/profile")
+async def get_profile(seconds: float = 10):
+    # Collapsed stacks for flamegraph.pl / speedscope. Off unless PITWALL_PROFILING=1.
+    if not PROFILING_ENABLED: raise HTTPException(status_code=404, detail="Profiling disabled")
+    seconds = min(max(seconds, 0.1), MAX_PROFILE_SECONDS)
+    stacks = await asyncio.to_thread(metrics.sample_stacks, seconds)
+    return PlainTextResponse(stacks)
+
+@app.get("/debug/memory/{session_key}")
+def get_memory_report(session_key: str):
+    session = get_session(session_key)
+    if not session: raise HTTPException(status_code=404, detail="Session not found")
+    return JSONResponse(content=session.memory_report())
+
 @app.websocket("/ws/{session_key}")
 async def websocket_endpoint(websocket: WebSocket, session_key: str):
     await websocket.accept()
@@ -99,6 +292,7 @@ async def websocket_endpoint(websocket: WebSocket, session_key: str):
         return
 
     print(f"Client connected: {session_key}")
+    ACTIVE_SOCKETS.inc(session=session_key)
     t = 0
     step = int(FRAME_INTERVAL * 1000)
     
@@ -106,20 +300,26 @@ async def websocket_endpoint(websocket: WebSocket, session_key: str):
         while True:
             # 1. Send Telemetry
             if t <= session.max_time:
-                msg = [str(t)]
-                
-                for d_id, df in session.drivers_data.items():
-                    if t in df.index:
-                        row = df.loc[t]
-                        # Ensure we have valid coordinates (not 0,0)
-                        # NOTE: We send even if 0,0 just to see if they exist
-                        s = f"{d_id},{int(row['x'])},{int(row['y'])},{int(row['position'])}"
-                        msg.append(s)
-                        
-                        if d_id == 1: debug_driver_str = s
-
-                if len(msg) > 1: 
-                    await websocket.send_text("|".join(msg))
+                encode_start = time.perf_counter()
+                frame = session.encode_frame(t)
+                send_start = time.perf_counter()
+                ENCODE_SECONDS.observe(send_start - encode_start, session=session_key)
+
+                if frame: 
+                    await websocket.send_text(frame)
+
+                # Sparse race state: only on ticks where something happened
+                if t in session.leaderboard_changes:
+                    await websocket.send_text(f"{t}|LEADERBOARD|" + ",".join(map(str, session.leaderboard_changes[t])))
+                for evt in session.events.get(t, []):
+                    await websocket.send_text(f"{t}|EVENT|{evt}")
+                if t % GAPS_INTERVAL_MS == 0:
+                    gaps = session.encode_gaps(t)
+                    if gaps: await websocket.send_text(gaps)
+
+                send_end = time.perf_counter()
+                SEND_SECONDS.observe(send_end - send_start, session=session_key)
+                if send_end - encode_start > FRAME_INTERVAL: DROPPED_FRAMES.inc(session=session_key)
 
                 t += step
             
@@ -133,6 +333,43 @@ async def websocket_endpoint(websocket: WebSocket, session_key: str):
             
     except Exception as e:
         print(f"Client disconnected: {e}")
+    finally:
+        ACTIVE_SOCKETS.dec(session=session_key)
+
+async def send_live_frames(websocket: WebSocket, queue, session_key: str):
+    while True:
+        frame = await queue.get()
+        send_start = time.perf_counter()
+        await websocket.send_text(frame)
+        SEND_SECONDS.observe(time.perf_counter() - send_start, session=f"live_{session_key}")
+
+async def wait_for_disconnect(websocket: WebSocket):
+    # Client messages are ignored; returns as soon as the client goes away
+    while (await websocket.receive())["type"] != "websocket.disconnect": pass
+
+@app.websocket("/ws/live/{session_key}")
+async def live_websocket_endpoint(websocket: WebSocket, session_key: str):
+    # Polls OpenF1 (or OPENF1_BASE_URL) while at least one client is connected
+    await websocket.accept()
+    if not (session_key.isascii() and session_key.isdigit()):
+        await websocket.close(code=4004)
+        return
+    live = get_live_session(session_key)
+    queue = live.subscribe()
+
+    print(f"Live client connected: {session_key}")
+    ACTIVE_SOCKETS.inc(session=f"live_{session_key}")
+    # Sender and receiver run side by side so a close is seen even while no frames are coming in
+    tasks = [asyncio.create_task(send_live_frames(websocket, queue, session_key)), asyncio.create_task(wait_for_disconnect(websocket))]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        errors = [t.exception() for t in done if t.exception()]
+        print(f"Live client disconnected: {errors[0] if errors else session_key}")
+    finally:
+        for task in tasks: task.cancel()
+        live.unsubscribe(queue)
+        if not live.subscribers: live_sessions.pop(session_key, None)
+        ACTIVE_SOCKETS.dec(session=f"live_{session_key}")
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,32 +1,165 @@
-import pandas as pd
+import argparse
+import csv
 import glob
+import json
 import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Streaming integrity checker for a session's telemetry CSVs.
+# Every driver file is read once, row by row, in its own worker process. Checks:
+#   - time_offset must be strictly increasing (regressions + duplicate ticks, which load_data drops)
+#   - gaps between samples above --max-gap ms
+#   - x/y outside the track_layout.json bounds (+ --margin)
+#   - lap_number going backwards (0 = "no lap yet" in the builder output and is ignored)
+#   - malformed rows (fewer fields than the header, e.g. a truncated last line, or a non-numeric time_offset)
 
 # CONFIG
 SESSION_KEY = 9523
-DATA_DIR = f"race_data_{SESSION_KEY}/telemetry"
-
-print(f"--- INSPECTING CSV DATA ({DATA_DIR}) ---")
-
-csv_files = glob.glob(f"{DATA_DIR}/*.csv")
-if not csv_files:
-    print("No CSV files found!")
-    exit()
-
-for f in csv_files:
-    d_id = os.path.basename(f)
-    df = pd.read_csv(f)
-    
-    if 'time_offset' not in df.columns:
-        print(f"{d_id}: ERROR - No 'time_offset' column")
-        continue
-        
-    count = len(df)
-    t_min = df['time_offset'].min()
-    t_max = df['time_offset'].max()
-    duration_sec = (t_max - t_min) / 1000
-    duration_min = duration_sec / 60
-    
-    print(f"{d_id:<15} | Rows: {count:<6} | Max Offset: {t_max:<8} ms | Duration: {duration_min:.2f} min")
-
-print("-" * 50)
\ No newline at end of file
+MAX_GAP_MS = 2000
+BOUNDS_MARGIN = 500
+MAX_EXAMPLES = 5 # offending time_offsets (line numbers for malformed rows) kept per check
+
+
+def load_bounds(session_dir):
+    path = f"{session_dir}/track_layout.json"
+    if not os.path.exists(path): return None
+    with open(path) as f: bounds = json.load(f).get("bounds")
+    # The builder leaves all-zero bounds when it couldn't fetch the track
+    if not bounds or not any(bounds.values()): return None
+    return bounds
+
+
+def to_float(value):
+    try: return float(value)
+    except ValueError: return None
+
+
+def validate_file(path, bounds, max_gap_ms, margin):
+    d_id = os.path.basename(path)
+    report = {"file": d_id, "rows": 0, "errors": [], "checks": {}}
+    checks = {name: {"count": 0, "examples": []} for name in ["non_monotonic", "duplicate_ticks", "gaps", "out_of_bounds", "lap_regressions", "malformed_rows"]}
+
+    def flag(name, t):
+        checks[name]["count"] += 1
+        if len(checks[name]["examples"]) < MAX_EXAMPLES: checks[name]["examples"].append(t)
+
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header or "time_offset" not in header:
+            report["errors"].append("No 'time_offset' column")
+            return report
+
+        i_t = header.index("time_offset")
+        i_x = header.index("x") if "x" in header else None
+        i_y = header.index("y") if "y" in header else None
+        i_lap = header.index("lap_number") if "lap_number" in header else None
+        if bounds:
+            min_x, max_x = bounds["min_x"] - margin, bounds["max_x"] + margin
+            min_y, max_y = bounds["min_y"] - margin, bounds["max_y"] + margin
+
+        t_min = t_prev = None
+        lap_prev = 0
+        rows = 0
+        for row in reader:
+            if not row: continue
+            rows += 1
+            t = to_float(row[i_t]) if len(row) >= len(header) else None
+            if t is None:
+                # Truncated row or a non-numeric time_offset
+                flag("malformed_rows", reader.line_num)
+                continue
+
+            if t_prev is not None:
+                if t == t_prev: flag("duplicate_ticks", t)
+                elif t < t_prev: flag("non_monotonic", t)
+                elif t - t_prev > max_gap_ms: flag("gaps", t)
+            else:
+                t_min = t
+            if t_prev is None or t > t_prev: t_prev = t
+
+            if bounds and i_x is not None and i_y is not None:
+                x, y = to_float(row[i_x]), to_float(row[i_y])
+                if x is not None and y is not None and not (min_x <= x <= max_x and min_y <= y <= max_y):
+                    flag("out_of_bounds", t)
+
+            if i_lap is not None:
+                lap = to_float(row[i_lap]) or 0
+                if lap:
+                    if lap < lap_prev: flag("lap_regressions", t)
+                    lap_prev = max(lap_prev, lap)
+
+    if t_prev is None: report["errors"].append("No valid samples")
+    report["rows"] = rows
+    report["min_offset"] = t_min
+    report["max_offset"] = t_prev
+    report["checks"] = checks
+    return report
+
+
+def validate_session(session_key, max_gap_ms=MAX_GAP_MS, margin=BOUNDS_MARGIN, workers=None):
+    session_dir = f"race_data_{session_key}"
+    csv_files = sorted(glob.glob(f"{session_dir}/telemetry/*.csv"))
+    bounds = load_bounds(session_dir)
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        files = list(pool.map(validate_file, csv_files, [bounds] * len(csv_files), [max_gap_ms] * len(csv_files), [margin] * len(csv_files)))
+
+    totals = {}
+    for r in files:
+        for name, c in r["checks"].items(): totals[name] = totals.get(name, 0) + c["count"]
+
+    return {
+        "session_key": session_key,
+        "files": len(files),
+        "rows": sum(r["rows"] for r in files),
+        "elapsed_sec": time.perf_counter() - start,
+        "settings": {"max_gap_ms": max_gap_ms, "bounds_margin": margin, "bounds": bounds},
+        "ok": not any(r["errors"] for r in files) and not any(totals.values()),
+        "totals": totals,
+        "drivers": files,
+    }
+
+
+def print_summary(report):
+    print(f"--- VALIDATING CSV DATA (race_data_{report['session_key']}/telemetry) ---")
+    for r in report["drivers"]:
+        if r["errors"]:
+            print(f"{r['file']:<15} | ERROR - {'; '.join(r['errors'])}")
+            continue
+        issues = ", ".join(f"{k}={v['count']}" for k, v in r["checks"].items() if v["count"]) or "OK"
+        if r["max_offset"] is None:
+            print(f"{r['file']:<15} | Rows: {r['rows']:<6} | No valid samples | {issues}")
+            continue
+        duration_min = (r["max_offset"] - r["min_offset"]) / 1000 / 60
+        print(f"{r['file']:<15} | Rows: {r['rows']:<6} | Max Offset: {r['max_offset']:<10.0f} ms | Duration: {duration_min:.2f} min | {issues}")
+    print("-" * 50)
+    print(f"{report['files']} files, {report['rows']} rows in {report['elapsed_sec']:.2f}s -> {'OK' if report['ok'] else 'ISSUES FOUND'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validate a session's telemetry CSVs")
+    parser.add_argument("session_key", nargs="?", default=SESSION_KEY)
+    parser.add_argument("--max-gap", type=int, default=MAX_GAP_MS, help="flag sample gaps above this many ms")
+    parser.add_argument("--margin", type=int, default=BOUNDS_MARGIN, help="slack around track bounds")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--json", metavar="PATH", help="write the machine-readable report here ('-' for stdout)")
+    parser.add_argument("--strict", action="store_true", help="exit 1 if any check fails")
+    args = parser.parse_args()
+
+    report = validate_session(args.session_key, args.max_gap, args.margin, args.workers)
+    if not report["files"]:
+        print("No CSV files found!")
+        sys.exit(1)
+
+    if args.json == "-":
+        print(json.dumps(report, indent=4))
+    else:
+        print_summary(report)
+        if args.json:
+            with open(args.json, "w") as f: json.dump(report, f, indent=4)
+
+    if args.strict and not report["ok"]: sys.exit(1)
@@ -0,0 +1,217 @@
+import json
+
+import numpy as np
+
+# Distance-along-track projection over track_layout.json's `track_path`.
+#
+# The racing line is a closed polyline. A uniform grid over its bounding box stores, per cell, the
+# few segments that can be nearest to any point in that cell, so projecting a batch of cars only
+# tests a handful of segments per car instead of the whole lap. Distance along the lap is then
+# unwrapped over time into race progress, which gives per-tick order and time gaps that do not
+# depend on OpenF1's (coarse, often stale) intervals feed.
+
+CELL_SIZE = 100 # track units (~dm) per grid cell
+SEARCH_RADIUS = 300 # points further than this from the line fall back to a full scan (pit lane, garage)
+ORDER_MARGIN_S = 0.5 # seconds a car has to be clear before two cars swap places (location noise when nose to tail)
+ORDER_HOLD = 10 # ticks the new leader has to stay that far clear, so a brief side-by-side moment is not a pass
+
+
+class TrackIndex:
+    def __init__(self, track_path, cell_size=CELL_SIZE, search_radius=SEARCH_RADIUS):
+        pts = np.array([[p['x'], p['y']] for p in track_path], dtype=np.float64)
+        if len(pts) < 2: raise ValueError("track_path needs at least 2 points")
+        pts = trim_overlap(pts, search_radius)
+        if not np.array_equal(pts[0], pts[-1]): pts = np.vstack([pts, pts[:1]]) # close the lap
+
+        self.seg_ax, self.seg_ay = pts[:-1, 0], pts[:-1, 1]
+        self.seg_dx, self.seg_dy = pts[1:, 0] - pts[:-1, 0], pts[1:, 1] - pts[:-1, 1]
+        self.seg_len2 = np.maximum(self.seg_dx ** 2 + self.seg_dy ** 2, 1e-9)
+        self.seg_len = np.sqrt(self.seg_len2)
+        self.seg_start = np.concatenate([[0], np.cumsum(self.seg_len)[:-1]])
+        self.length = float(self.seg_len.sum())
+        self.all_segments = np.arange(len(self.seg_len))
+
+        self.cell_size = cell_size
+        self.search_radius = search_radius
+        self.build_grid()
+
+    def build_grid(self):
+        margin = self.search_radius + self.cell_size
+        seg_pts = np.stack([self.seg_ax, self.seg_ay], axis=1)
+        self.origin = seg_pts.min(axis=0) - margin
+        self.shape = (np.ceil((seg_pts.max(axis=0) + margin - self.origin) / self.cell_size).astype(int) + 1)
+
+        # Candidate segments per cell: any segment within (radius + half cell diagonal) of the cell centre
+        gx, gy = np.meshgrid(np.arange(self.shape[0]), np.arange(self.shape[1]), indexing='ij')
+        centres = self.origin + (np.stack([gx.ravel(), gy.ravel()], axis=1) + 0.5) * self.cell_size
+        reach = self.search_radius + self.cell_size * np.sqrt(2) / 2
+        near = self.segment_distances(centres) <= reach
+
+        # Fixed-width table so lookups stay vectorized; short rows are padded with their own first segment
+        width = max(1, int(near.sum(axis=1).max()))
+        table = np.full((len(centres), width), -1, dtype=np.int32)
+        for i, segs in enumerate(near):
+            ids = np.flatnonzero(segs)
+            if len(ids): table[i] = np.pad(ids, (0, width - len(ids)), mode='edge')
+        self.grid = table
+
+    def segment_distances(self, pts):
+        # (N, segments) distance from each point to each segment; only used to build the grid
+        rx = pts[:, :1] - self.seg_ax
+        ry = pts[:, 1:] - self.seg_ay
+        t = np.clip((rx * self.seg_dx + ry * self.seg_dy) / self.seg_len2, 0, 1)
+        return np.hypot(rx - t * self.seg_dx, ry - t * self.seg_dy)
+
+    def project_onto(self, pts, seg_ids):
+        # pts (N, 2), seg_ids (N, K) -> per point: index of the nearest candidate, its t along the segment
+        # and squared distance. x and y are kept as separate (N, K) arrays to avoid (N, K, 2) temporaries.
+        px, py = pts[:, :1], pts[:, 1:]
+        ax, ay = self.seg_ax[seg_ids], self.seg_ay[seg_ids]
+        dx, dy = self.seg_dx[seg_ids], self.seg_dy[seg_ids]
+        rx, ry = px - ax, py - ay
+        t = np.clip((rx * dx + ry * dy) / self.seg_len2[seg_ids], 0, 1)
+        ox, oy = rx - t * dx, ry - t * dy
+        dist2 = ox * ox + oy * oy
+        best = dist2.argmin(axis=1)
+        rows = np.arange(len(pts))
+        return seg_ids[rows, best], t[rows, best], dist2[rows, best]
+
+    def along(self, seg, t):
+        return self.seg_start[seg] + t * self.seg_len[seg]
+
+    def project(self, x, y):
+        """Distance along the lap (0 = first track_path point) and distance from the line, for arrays of x/y."""
+        pts = np.stack([np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)], axis=1)
+        cells = np.floor((pts - self.origin) / self.cell_size).astype(int)
+        inside = ((cells >= 0) & (cells < self.shape)).all(axis=1)
+        cell_ids = np.where(inside, cells[:, 0] * self.shape[1] + cells[:, 1], 0)
+        seg_ids = self.grid[cell_ids]
+
+        along = np.zeros(len(pts))
+        dist2 = np.full(len(pts), np.inf)
+        ok = inside & (seg_ids[:, 0] >= 0)
+        if ok.any():
+            seg, t, d2 = self.project_onto(pts[ok], seg_ids[ok])
+            along[ok], dist2[ok] = self.along(seg, t), d2
+
+        # Off the indexed corridor: exact answer from every segment
+        far = dist2 > self.search_radius ** 2
+        if far.any():
+            seg, t, d2 = self.project_onto(pts[far], np.broadcast_to(self.all_segments, (int(far.sum()), len(self.all_segments))))
+            along[far], dist2[far] = self.along(seg, t), d2
+        return along, np.sqrt(dist2)
+
+
+def trim_overlap(pts, tolerance):
+    """Cut a recorded lap whose tail runs past its first point, so the closed lap does not retrace itself.
+
+    Builder laps often start a little after the line and end a little after it too; left in, the start
+    of the lap exists twice and cars near the line snap back and forth between the two copies.
+    """
+    if len(pts) < 4: return pts
+    half = len(pts) // 2
+    ax, ay = pts[half:-1, 0], pts[half:-1, 1]
+    dx, dy = pts[half + 1:, 0] - ax, pts[half + 1:, 1] - ay
+    t = np.clip(((pts[0, 0] - ax) * dx + (pts[0, 1] - ay) * dy) / np.maximum(dx * dx + dy * dy, 1e-9), 0, 1)
+    dist = np.hypot(ax + t * dx - pts[0, 0], ay + t * dy - pts[0, 1])
+    seg = int(dist.argmin())
+    # A tail that stops short of the start is closest at its last point (t == 1): nothing to cut
+    if dist[seg] > tolerance or t[seg] >= 1: return pts
+    return pts[:half + seg + 1]
+
+
+def load_track_index(base_path):
+    with open(f"{base_path}/track_layout.json") as f: layout = json.load(f)
+    return TrackIndex(layout.get("track_path", []))
+
+
+def race_progress(distance, length):
+    """(ticks, drivers) lap distance -> cumulative distance raced. Cars starting behind the line begin negative."""
+    distance = distance.astype(np.float64)
+    distance[0] = np.where(distance[0] > length / 2, distance[0] - length, distance[0])
+    return np.unwrap(distance, period=length, axis=0)
+
+
+def held(mask, ticks):
+    # True where mask has been True for the last `ticks` ticks in a row
+    count = np.concatenate([[0], np.cumsum(mask)])
+    out = np.zeros(len(mask), dtype=bool)
+    out[ticks - 1:] = (count[ticks:] - count[:-ticks]) == ticks
+    return out
+
+
+def ahead_with_hysteresis(lead, margin, hold, first):
+    # lead = seconds car a is ahead of car b per tick. True while a is ahead; only flips once the new
+    # leader has been `margin` clear for `hold` ticks. `first` is the order on the first tick.
+    state = np.where(held(lead > margin, hold), 1, np.where(held(lead < -margin, hold), 0, -1)).astype(np.int8)
+    if state[0] < 0: state[0] = first
+    last = np.maximum.accumulate(np.where(state >= 0, np.arange(len(lead)), 0))
+    return state[last].astype(bool)
+
+
+def hold_after(values, stop_idx):
+    # Per column, repeat the value at stop_idx[col] for every later row
+    values = values.copy()
+    for col, i in enumerate(stop_idx):
+        if 0 <= i < len(values): values[i:, col] = values[i, col]
+    return values
+
+
+def freeze_finishers(progress, finish_idx, length):
+    """Hold each driver exactly on the line they finished on, from their finish tick on.
+
+    The line's along-track position is taken from where cars are when their last lap ends. Finishers on
+    the same lap are separated by a tiny amount per tick so they keep their finishing order.
+    """
+    done = [(col, i) for col, i in enumerate(finish_idx) if 0 <= i < len(progress)]
+    if not done: return progress
+    at_finish = np.array([progress[i, col] for col, i in done])
+    line = at_finish[0] + np.median((at_finish - at_finish[0] + length / 2) % length - length / 2)
+    progress = progress.copy()
+    for (col, i), p in zip(done, at_finish):
+        progress[i:, col] = line + np.round((p - line) / length) * length - i * 1e-6
+    return progress
+
+
+def race_order_and_gaps(progress, ticks_ms, finish_idx=None, length=None, margin=ORDER_MARGIN_S, hold=ORDER_HOLD):
+    """Per-tick position (1 = leader), gap to leader and interval in seconds, from (ticks, drivers) progress.
+
+    The gap is how long ago the race front was where this car is now. Two cars only swap places once the
+    new leader has been `margin` seconds clear for `hold` ticks. With finish_idx (tick index per driver at
+    which their last lap ends) and the lap length, finished cars are held on the line and keep their gap,
+    so the cool-down lap does not reshuffle the result.
+    """
+    n = progress.shape[1]
+    frozen = np.zeros(progress.shape, dtype=bool)
+    if finish_idx is not None:
+        progress = freeze_finishers(progress, finish_idx, length)
+        frozen = np.arange(len(progress))[:, None] >= np.asarray(finish_idx)[None, :]
+
+    front = np.maximum.accumulate(progress.max(axis=1))
+    gap = np.empty(progress.shape, dtype=np.float64)
+    for col in range(n):
+        gap[:, col] = (ticks_ms - np.interp(progress[:, col], front, ticks_ms)) / 1000
+
+    cars_ahead = np.zeros(progress.shape, dtype=np.int16)
+    for a in range(n):
+        for b in range(a + 1, n):
+            diff = progress[:, a] - progress[:, b]
+            a_ahead = ahead_with_hysteresis(gap[:, b] - gap[:, a], margin, hold, diff[0] > 0)
+            # Two finished cars are ordered exactly: laps first, then who took the flag first
+            both = frozen[:, a] & frozen[:, b]
+            a_ahead[both] = diff[both] > 0
+            cars_ahead[:, b] += a_ahead
+            cars_ahead[:, a] += ~a_ahead
+    order = np.lexsort((-progress, cars_ahead), axis=1)
+    position = np.empty_like(order)
+    np.put_along_axis(position, order, np.arange(1, n + 1)[None, :], axis=1)
+
+    gap = np.maximum(gap, 0)
+    if finish_idx is not None: gap = hold_after(gap, finish_idx)
+
+    # A car can hold its place while up to `margin` behind the one it follows, so clamp those intervals to 0
+    gap_sorted = np.take_along_axis(gap, order, axis=1)
+    interval_sorted = np.maximum(np.diff(gap_sorted, axis=1, prepend=gap_sorted[:, :1]), 0)
+    interval = np.empty_like(gap)
+    np.put_along_axis(interval, order, interval_sorted, axis=1)
+    return position, gap, interval